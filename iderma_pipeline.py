@@ -1,14 +1,14 @@
 import asyncio
 import os
-import aiohttp
 import pandas as pd
-from datetime import date, timedelta, datetime
+from datetime import date, timedelta
 from pathlib import Path
-from io import StringIO
 import unicodedata
 import locale
 from playwright.async_api import async_playwright
 
+from respondio_client import cargar_tokens, subir_contactos_dataframe
+
 print(">>> SCRIPT CARGADO <<<", flush=True)
 
 # ======================================================
@@ -41,202 +41,12 @@ CSV_BASE = BASE_DIR / "CSV" / "Iderma"
 (CSV_BASE / "Bori").mkdir(parents=True, exist_ok=True)
 
 # ======================================================
-# RESPOND.IO (INTEGRADO 100% - MISMA LÓGICA)
+# RESPOND.IO (LÓGICA COMPARTIDA EN respondio_client.py)
 # ======================================================
-BASE_URL = "https://api.respond.io/v2"
-
-def _require_env(name: str) -> str:
-    val = os.getenv(name, "").strip()
-    if not val:
-        raise RuntimeError(f"Falta variable de entorno: {name}")
-    return val
-
-TOKENS = {
-    "sabino": _require_env("RESPONDIO_TOKEN_SABINO"),
-    "bori":   _require_env("RESPONDIO_TOKEN_BORI"),
-    "cdc":    _require_env("RESPONDIO_TOKEN_CDC"),
-    "rey":    _require_env("RESPONDIO_TOKEN_REY"),
-}
-
-def authenticate(token: str) -> dict:
-    return {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-
-def convertir_fecha_iso(raw):
-    if not raw or str(raw).strip() == "":
-        return ""
-    try:
-        dt = datetime.strptime(raw, "%m/%d/%y")
-        return dt.strftime("%Y-%m-%d")
-    except:
-        return ""
-
-async def get_contact(session: aiohttp.ClientSession, phone: str):
-    url = f"{BASE_URL}/contact/phone:{phone}"
-    async with session.get(url) as r:
-        if r.status == 200:
-            return await r.json()
-        if r.status == 404:
-            return None
-        return {"error": r.status, "detail": await r.text()}
-
-async def create_contact(session: aiohttp.ClientSession, payload: dict):
-    phone = payload["phone"]
-    url = f"{BASE_URL}/contact/phone:{phone}"
-    async with session.post(url, json=payload) as r:
-        text = await r.text()
-        if r.status in (200, 201):
-            return await r.json()
-        return {"error": r.status, "detail": text}
-
-async def update_contact(session: aiohttp.ClientSession, phone: str, payload: dict):
-    url = f"{BASE_URL}/contact/phone:{phone}"
-    async with session.put(url, json=payload) as r:
-        text = await r.text()
-        if r.status == 200:
-            return await r.json()
-        return {"error": r.status, "detail": text}
-
-async def upsert_contact(session: aiohttp.ClientSession, payload: dict):
-    phone = payload["phone"]
-    exists = await get_contact(session, phone)
-    if exists is None:
-        return await create_contact(session, payload)
-    else:
-        return await update_contact(session, phone, payload)
-
-def convertir_row_a_payload(row: pd.Series) -> dict:
-    phone = str(row["Phone Number"]).strip()
-    fecha_iso = convertir_fecha_iso(row["Fecha Num"])
-    location = str(row["Location"]).strip()
-
-    return {
-        "firstName": str(row["First Name"]).strip(),
-        "phone": phone,
-        "custom_fields": [
-            {"name": "fecha_cita", "value": fecha_iso},
-            {"name": "fecha_larga", "value": str(row["Fecha Text"]).strip()},
-            {"name": "hora_cita", "value": str(row["Hora"]).strip()},
-            {"name": "nombre_doctor", "value": str(row["Doctor"]).strip()},
-            {"name": "location", "value": location},
-        ]
-    }
-
-async def subir_contacto(payload: dict, session: aiohttp.ClientSession) -> dict:
-    res = await upsert_contact(session, payload)
-    if isinstance(res, dict) and "error" in res:
-        return {
-            "status": "error",
-            "phone": payload["phone"],
-            "error": res["error"],
-            "detail": res["detail"]
-        }
-    return {"status": "ok", "phone": payload["phone"]}
-
-# ===============================================================
-#     NUEVA FUNCIÓN — ACTUALIZAR id_pac A TODOS LOS CONTACTOS
-# ===============================================================
-async def actualizar_id_pac_en_batch(phones, workspace, concurrencia=5):
-    token = TOKENS.get(workspace.lower())
-    if not token:
-        raise ValueError(f"Workspace inválido: {workspace}")
-
-    headers = authenticate(token)
-    sem = asyncio.Semaphore(concurrencia)
-
-    payload_idpac = {
-        "custom_fields": [
-            {"name": "id_pac", "value": 69}
-        ]
-    }
-
-    results_ok = []
-    results_err = []
-
-    async with aiohttp.ClientSession(headers=headers) as session:
-
-        async def procesar(phone):
-            async with sem:
-                url = f"{BASE_URL}/contact/phone:{phone}"
-                async with session.put(url, json=payload_idpac) as r:
-                    text = await r.text()
-                    if r.status == 200:
-                        results_ok.append(phone)
-                    else:
-                        results_err.append({
-                            "phone": phone,
-                            "error": r.status,
-                            "detail": text
-                        })
-
-        await asyncio.gather(*(procesar(p) for p in phones))
-
-    print("\n==============================")
-    print(" ACTUALIZACIÓN id_pac FINALIZADA ")
-    print("==============================")
-    print(f"Total procesados: {len(phones)}")
-    print(f"Correctos:        {len(results_ok)}")
-    print(f"Errores:          {len(results_err)}")
-
-    if results_err:
-        print("\n--- ERRORES ---")
-        for e in results_err:
-            print(f"{e['phone']} → ERROR {e['error']}")
-            print(f"Detalle: {e['detail']}")
-
-    print("==============================\n")
-
-    return {"ok": results_ok, "error": results_err}
-
-# ===============================================================
-#     FUNCIÓN PRINCIPAL — INCLUYE ACTUALIZACIÓN id_pac
-# ===============================================================
-async def subir_contactos_dataframe(df: pd.DataFrame, workspace: str, concurrencia=5):
-    token = TOKENS.get(workspace.lower())
-    if not token:
-        raise ValueError(f"Workspace inválido: {workspace}")
-
-    headers = authenticate(token)
-    sem = asyncio.Semaphore(concurrencia)
-
-    results_ok = []
-    results_err = []
-
-    async with aiohttp.ClientSession(headers=headers) as session:
-
-        async def procesar(row):
-            async with sem:
-                payload = convertir_row_a_payload(row)
-                r = await subir_contacto(payload, session)
-                if r["status"] == "ok":
-                    results_ok.append(r["phone"])
-                else:
-                    results_err.append(r)
-
-        await asyncio.gather(*(procesar(row) for _, row in df.iterrows()))
-
-    print("\n==============================")
-    print("        RESUMEN UP SERT")
-    print("==============================")
-    print(f"Total enviados:  {len(df)}")
-    print(f"Correctos:       {len(results_ok)}")
-    print(f"Errores:         {len(results_err)}")
-
-    if results_err:
-        print("\n--- ERRORES ---")
-        for e in results_err:
-            print(f"{e['phone']} → ERROR {e['error']}")
-            print(f"Detalle: {e['detail']}")
-
-    print("==============================")
-
-    await actualizar_id_pac_en_batch(results_ok, workspace, concurrencia)
-
-
-    return {"ok": results_ok, "error": results_err}
+# Falla al arrancar si falta algún token, antes de abrir el navegador.
+TOKENS = cargar_tokens()
+
+ID_PAC_VALUE = int(os.getenv("RESPONDIO_ID_PAC", "69"))
 
 # ======================================================
 # UTILIDADES (TU SCRIPT)
@@ -369,43 +179,64 @@ async def descargar_agenda(page):
 # ======================================================
 # TRANSFORMACIÓN COMPLETA (TU SCRIPT)
 # ======================================================
+# Solo estas columnas del export de Iderma se usan en el proceso;
+# el resto se descarta nada más parsear el HTML.
+COLUMNAS_AGENDA = ["Nombre", "movil", "Start Time", "Prof", "Centro", "Estado", "Acto ID"]
+COLUMNAS_CATEGORIA = ["Prof", "Centro", "Estado", "Acto ID"]
+VERIFICACIONES = ["Verif1_Agenda", "Verif2_Acto", "Verif3_Centro", "Verif4_Repetido", "Verif5_Mañana"]
+
 def cargar_auxiliares(ruta_aux: Path):
     hojas = ["Agenda", "Acto", "Centro", "Doctor", "Direccion"]
     return {h: pd.read_excel(ruta_aux, sheet_name=h) for h in hojas}
 
+def cargar_agenda(ruta_archivo: Path) -> pd.DataFrame:
+    with open(ruta_archivo, "r", encoding="utf-8", errors="ignore") as f:
+        df = pd.read_html(f, flavor=["lxml", "html5lib"])[0]
+    df = df[COLUMNAS_AGENDA]
+    return df.astype({c: "category" for c in COLUMNAS_CATEGORIA})
+
+def _codigos_con_envio(tabla: pd.DataFrame, clave: str, envio: str):
+    # Clave repetida en el auxiliar: manda la última fila (como el antiguo .to_dict())
+    tabla = tabla.drop_duplicates(subset=[clave], keep="last")
+    return tabla.loc[tabla["Enviar confirmación?"] == envio, clave]
+
 def aplicar_verificaciones(df: pd.DataFrame, aux: dict):
+    df = df.drop_duplicates(subset=["movil"], keep="first", ignore_index=True)
+
     doctor_map = aux["Doctor"].set_index("Dr Codigo")["Nombre Profesional"].to_dict()
-    df["Nombre Profesional"] = df["Prof"].map(doctor_map)
+    df["Nombre Profesional"] = df["Prof"].map(doctor_map).astype("category")
 
     direccion_map = aux["Direccion"].set_index("Clinica")["Direccion"].to_dict()
-    df["Direccion Centro"] = df["Centro"].map(direccion_map)
+    df["Direccion Centro"] = df["Centro"].map(direccion_map).astype("category")
 
-    df["Verif1_Agenda"] = df["Estado"].map(aux["Agenda"].set_index("Código")["Enviar confirmación?"]).fillna("No")
+    # Flags booleanos; "Si"/"No" solo se escribe en el Excel de auditoría.
+    # Estado/Centro sin fila en el auxiliar -> No; Acto sin fila -> Si.
+    df["Verif1_Agenda"] = df["Estado"].isin(_codigos_con_envio(aux["Agenda"], "Código", "Si"))
 
     acto_df = aux["Acto"].drop_duplicates(subset=["actID"], keep="first")
-    acto_map = acto_df.set_index("actID")["Enviar confirmación?"].to_dict()
-    df["Verif2_Acto"] = df["Acto ID"].map(acto_map).fillna("Si")
+    envio_acto = acto_df["Enviar confirmación?"]
+    acto_df = acto_df[envio_acto.notna() & (envio_acto != "Si")]
+    df["Verif2_Acto"] = ~df["Acto ID"].isin(acto_df["actID"])
 
-    centro_map = aux["Centro"].set_index("Centro")["Enviar confirmación?"].to_dict()
-    df["Verif3_Centro"] = df["Centro"].map(centro_map).fillna("No")
+    df["Verif3_Centro"] = df["Centro"].isin(_codigos_con_envio(aux["Centro"], "Centro", "Si"))
 
-    df = df.drop_duplicates(subset=["movil"], keep="first").reset_index(drop=True)
-    df["Verif4_Repetido"] = "Si"
+    df["Verif4_Repetido"] = True
 
     hoy = date.today()
     d = hoy.weekday()
     mañana = hoy + timedelta(days=1 if d < 4 else (7 - d) % 7 or 7)
 
-    df["Verif5_Mañana"] = df["Start Time"].apply(
-        lambda x: "Si" if pd.to_datetime(x, errors="coerce").date() == mañana else "No"
-    )
+    inicio = pd.to_datetime(df["Start Time"], errors="coerce", format="mixed")
+    df["Verif5_Mañana"] = inicio.dt.normalize() == pd.Timestamp(mañana)
 
-    df["Usar"] = df[["Verif1_Agenda", "Verif2_Acto", "Verif3_Centro", "Verif4_Repetido", "Verif5_Mañana"]].apply(
-        lambda r: "Si" if all(v == "Si" for v in r) else "No", axis=1
-    )
+    df["Usar"] = df[VERIFICACIONES].all(axis=1)
 
     return df
 
+def guardar_auditoria(df: pd.DataFrame, ruta: Path):
+    si_no = {c: df[c].map({True: "Si", False: "No"}) for c in VERIFICACIONES + ["Usar"]}
+    df.assign(**si_no).to_excel(ruta, index=False)
+
 def extraer_fecha_hora_es(valor):
     if pd.isna(valor) or str(valor).strip() == "":
         return "", "", ""
@@ -426,18 +257,14 @@ def extraer_fecha_hora_es(valor):
     return fecha_num, fecha_text, hora
 
 def transformar_y_generar_csv(ruta_archivo: Path, fecha_objetivo: date):
-    with open(ruta_archivo, "r", encoding="utf-8", errors="ignore") as f:
-        html = f.read()
-    df = pd.read_html(StringIO(html), flavor=["lxml", "html5lib"])[0]
-
     auxiliares = cargar_auxiliares(AUX_PATH)
-    df_final = aplicar_verificaciones(df, auxiliares)
+    df_final = aplicar_verificaciones(cargar_agenda(ruta_archivo), auxiliares)
 
     salida_xlsx = BASE_DIR / "agenda_filtrada.xlsx"
-    df_final.to_excel(salida_xlsx, index=False)
+    guardar_auditoria(df_final, salida_xlsx)
     print(f"\nArchivo Excel filtrado guardado:\n{salida_xlsx}")
 
-    df_final = df_final[df_final["Usar"] == "Si"].copy()
+    df_final = df_final[df_final["Usar"]]
 
     vacios = df_final[df_final["Nombre Profesional"].isna()]
     if not vacios.empty:
@@ -445,28 +272,27 @@ def transformar_y_generar_csv(ruta_archivo: Path, fecha_objetivo: date):
         print("Códigos problemáticos:", vacios["Prof"].unique())
         raise SystemExit("Proceso detenido por doctor vacío.")
 
-    # Guardamos originales para log de inválidos (tu código original aquí estaba mal referenciando df)
-    originales_movil = df_final["movil"].copy()
-
-    df_final["movil"] = df_final["movil"].apply(limpiar_telefono)
-    invalidos = df_final[df_final["movil"].isna()]
+    # El móvil limpio va en una serie aparte: la columna original queda para el log de inválidos
+    moviles = df_final["movil"].map(limpiar_telefono)
+    validos = moviles.notna()
 
-    for idx in invalidos.index:
-        print(f"⚠ Teléfono inválido excluido: {originales_movil.loc[idx]}")
+    for original in df_final.loc[~validos, "movil"]:
+        print(f"⚠ Teléfono inválido excluido: {original}")
 
-    df_final = df_final[df_final["movil"].notna()]
+    df_final = df_final[validos]
 
     base = pd.DataFrame()
     base["First Name"] = df_final["Nombre"].astype(str).str.title()
-    base["Phone Number"] = df_final["movil"]
+    base["Phone Number"] = moviles[validos]
 
     fechas = df_final["Start Time"].apply(extraer_fecha_hora_es)
     base["Fecha Num"] = [x[0] for x in fechas]
     base["Fecha Text"] = [x[1] for x in fechas]
     base["Hora"] = [x[2] for x in fechas]
 
-    base["Doctor"] = df_final["Nombre Profesional"].apply(lambda x: quitar_tildes(str(x)).replace("Marino", "Mariño"))
-    base["Location"] = df_final["Direccion Centro"].apply(quitar_tildes)
+    # En columnas category, .map transforma cada categoría una sola vez
+    base["Doctor"] = df_final["Nombre Profesional"].map(lambda x: quitar_tildes(str(x)).replace("Marino", "Mariño"))
+    base["Location"] = df_final["Direccion Centro"].map(quitar_tildes)
 
     sabino = base[base["Location"].str.contains("Sabino Arana", case=False, na=False)]
     bori = base[base["Location"].str.contains("Bori i Fontesta", case=False, na=False)]
@@ -517,10 +343,10 @@ async def main():
 
     # ====== SUBIDA RESPOND.IO (COMO ANTES) ======
     if sabino_df is not None and not sabino_df.empty:
-        await subir_contactos_dataframe(sabino_df, "sabino", concurrencia=5)
+        await subir_contactos_dataframe(sabino_df, "sabino", id_pac=ID_PAC_VALUE, concurrencia=5)
 
     if bori_df is not None and not bori_df.empty:
-        await subir_contactos_dataframe(bori_df, "bori", concurrencia=5)
+        await subir_contactos_dataframe(bori_df, "bori", id_pac=ID_PAC_VALUE, concurrencia=5)
 
 if __name__ == "__main__":
     asyncio.run(main())
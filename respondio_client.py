@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+import aiohttp
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BASE_URL: str = "https://api.respond.io/v2"
+DEFAULT_TIMEOUT_SECONDS: float = float(os.getenv("RESPONDIO_TIMEOUT_SECONDS", "30"))
+WORKSPACES = ("sabino", "bori", "cdc", "rey")
+
+Payloads = Union[Iterable[dict], AsyncIterable[dict]]
+
+
+def _require_env(name: str) -> str:
+    v = os.getenv(name, "").strip()
+    if not v:
+        raise RuntimeError(f"Falta variable de entorno: {name}")
+    return v
+
+
+@lru_cache(maxsize=None)
+def cargar_tokens() -> Dict[str, str]:
+    """Lee RESPONDIO_TOKEN_<WORKSPACE> de todos los workspaces; falla si falta alguno."""
+    return {ws: _require_env(f"RESPONDIO_TOKEN_{ws.upper()}") for ws in WORKSPACES}
+
+
+def token_workspace(workspace: str) -> str:
+    token = cargar_tokens().get(workspace.lower())
+    if not token:
+        raise ValueError(f"Workspace inválido: {workspace}")
+    return token
+
+
+def authenticate(token: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+    }
+
+
+def convertir_fecha_iso(raw: Any) -> str:
+    if raw is None or str(raw).strip() == "":
+        return ""
+    try:
+        dt = datetime.strptime(str(raw), "%m/%d/%y")
+        return dt.strftime("%Y-%m-%d")
+    except Exception:
+        return ""
+
+
+def convertir_row_a_payload(row: "pd.Series") -> dict:
+    phone = str(row["Phone Number"]).strip()
+    location = str(row["Location"]).strip()
+
+    return {
+        "firstName": str(row["First Name"]).strip(),
+        "phone": phone,
+        "custom_fields": [
+            {"name": "fecha_cita", "value": convertir_fecha_iso(row["Fecha Num"])},
+            {"name": "fecha_larga", "value": str(row["Fecha Text"]).strip()},
+            {"name": "hora_cita", "value": str(row["Hora"]).strip()},
+            {"name": "nombre_doctor", "value": str(row["Doctor"]).strip()},
+            {"name": "location", "value": location},
+        ],
+    }
+
+
+@dataclass(slots=True)
+class ContactResult:
+    """Resultado de una llamada a /contact. status=0 indica fallo de red/timeout."""
+
+    phone: str
+    status: int
+    data: Optional[dict] = None
+    detail: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def not_found(self) -> bool:
+        return self.status == 404
+
+
+@dataclass(slots=True)
+class BatchResult:
+    ok: List[str] = field(default_factory=list)
+    error: List[ContactResult] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.ok) + len(self.error)
+
+
+class RespondioClient:
+    """Cliente asíncrono de Respond.io con una única sesión HTTP reutilizada.
+
+    Uso:
+        async with RespondioClient(token) as client:
+            res = await client.upsert_many(payloads, concurrencia=5)
+    """
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        max_connections: int = 20,
+        base_url: str = BASE_URL,
+    ) -> None:
+        self._headers = authenticate(token)
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._base_url = base_url
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "RespondioClient":
+        self._session = aiohttp.ClientSession(
+            headers=self._headers,
+            timeout=aiohttp.ClientTimeout(total=self._timeout),
+            connector=aiohttp.TCPConnector(limit=self._max_connections),
+        )
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ------------------------------------------------------
+    # LLAMADAS INDIVIDUALES
+    # ------------------------------------------------------
+    async def _request(
+        self,
+        method: str,
+        phone: str,
+        payload: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> ContactResult:
+        if self._session is None:
+            raise RuntimeError("RespondioClient no está abierto (usar 'async with')")
+
+        url = f"{self._base_url}/contact/phone:{phone}"
+        kwargs: Dict[str, Any] = {}
+        if payload is not None:
+            kwargs["json"] = payload
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        try:
+            async with self._session.request(method, url, **kwargs) as r:
+                text = await r.text()
+                if 200 <= r.status < 300:
+                    # La escritura ya se ha hecho aunque el cuerpo no sea JSON
+                    try:
+                        data = json.loads(text) if text else None
+                    except ValueError:
+                        data = None
+                    return ContactResult(phone, r.status, data=data)
+                return ContactResult(phone, r.status, detail=text)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return ContactResult(phone, 0, detail=f"{type(e).__name__}: {e}")
+
+    async def get_contact(self, phone: str, *, timeout: Optional[float] = None) -> ContactResult:
+        return await self._request("GET", phone, timeout=timeout)
+
+    async def create_contact(self, payload: dict, *, timeout: Optional[float] = None) -> ContactResult:
+        return await self._request("POST", payload["phone"], payload, timeout=timeout)
+
+    async def update_contact(
+        self, phone: str, payload: dict, *, timeout: Optional[float] = None
+    ) -> ContactResult:
+        return await self._request("PUT", phone, payload, timeout=timeout)
+
+    async def upsert_contact(self, payload: dict, *, timeout: Optional[float] = None) -> ContactResult:
+        phone: str = payload["phone"]
+        exists = await self.get_contact(phone, timeout=timeout)
+        if exists.not_found:
+            return await self.create_contact(payload, timeout=timeout)
+        if not exists.ok:
+            return exists
+        return await self.update_contact(phone, payload, timeout=timeout)
+
+    # ------------------------------------------------------
+    # LOTES
+    # ------------------------------------------------------
+    async def _run_batch(
+        self,
+        items: Payloads,
+        worker: Callable[[Any], Awaitable[ContactResult]],
+        concurrencia: int,
+    ) -> BatchResult:
+        if concurrencia < 1:
+            raise ValueError(f"concurrencia debe ser >= 1 (recibido {concurrencia})")
+
+        # Cola acotada: el productor no adelanta más de `concurrencia` elementos,
+        # así un iterador asíncrono grande no se materializa en memoria.
+        result = BatchResult()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrencia)
+        done = object()
+
+        async def consumir() -> None:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                try:
+                    res = await worker(item)
+                except Exception as e:
+                    phone = item.get("phone", "") if isinstance(item, dict) else str(item)
+                    res = ContactResult(str(phone), 0, detail=f"{type(e).__name__}: {e}")
+                if res.ok:
+                    result.ok.append(res.phone)
+                else:
+                    result.error.append(res)
+
+        consumidores = [asyncio.create_task(consumir()) for _ in range(concurrencia)]
+        try:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await queue.put(item)
+            else:
+                for item in items:
+                    await queue.put(item)
+            for _ in consumidores:
+                await queue.put(done)
+            await asyncio.gather(*consumidores)
+        except BaseException:
+            for t in consumidores:
+                t.cancel()
+            await asyncio.gather(*consumidores, return_exceptions=True)
+            raise
+        return result
+
+    async def upsert_many(
+        self, payloads: Payloads, *, concurrencia: int = 5, timeout: Optional[float] = None
+    ) -> BatchResult:
+        async def worker(payload: dict) -> ContactResult:
+            return await self.upsert_contact(payload, timeout=timeout)
+
+        return await self._run_batch(payloads, worker, concurrencia)
+
+    async def update_many(
+        self,
+        phones: Union[Iterable[str], AsyncIterable[str]],
+        payload: dict,
+        *,
+        concurrencia: int = 5,
+        timeout: Optional[float] = None,
+    ) -> BatchResult:
+        """Aplica el mismo payload (p. ej. custom_fields) a cada teléfono."""
+
+        async def worker(phone: str) -> ContactResult:
+            return await self.update_contact(phone, payload, timeout=timeout)
+
+        return await self._run_batch(phones, worker, concurrencia)
+
+    async def actualizar_id_pac(
+        self,
+        phones: Union[Iterable[str], AsyncIterable[str]],
+        id_pac: int,
+        *,
+        concurrencia: int = 5,
+        timeout: Optional[float] = None,
+    ) -> BatchResult:
+        payload_idpac = {"custom_fields": [{"name": "id_pac", "value": id_pac}]}
+        return await self.update_many(phones, payload_idpac, concurrencia=concurrencia, timeout=timeout)
+
+
+# ======================================================
+# PUNTOS DE ENTRADA COMPARTIDOS
+# ======================================================
+def _imprimir_resumen(titulo: str, res: BatchResult) -> None:
+    print("\n==============================")
+    print(f" {titulo}")
+    print("==============================")
+    print(f"Total:      {res.total}")
+    print(f"Correctos:  {len(res.ok)}")
+    print(f"Errores:    {len(res.error)}")
+
+    if res.error:
+        print("\n--- ERRORES ---")
+        for e in res.error:
+            print(f"{e.phone} → ERROR {e.status}")
+            print(f"Detalle: {e.detail}")
+
+    print("==============================\n")
+
+
+async def actualizar_id_pac_en_batch(
+    phones: List[str],
+    workspace: str,
+    id_pac: int,
+    concurrencia: int = 5,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> BatchResult:
+    async with RespondioClient(token_workspace(workspace), timeout=timeout) as client:
+        res = await client.actualizar_id_pac(phones, id_pac, concurrencia=concurrencia)
+    _imprimir_resumen(f"ACTUALIZACIÓN id_pac={id_pac} ({workspace})", res)
+    return res
+
+
+async def subir_contactos_dataframe(
+    df: "pd.DataFrame",
+    workspace: str,
+    *,
+    id_pac: Optional[int],
+    concurrencia: int = 5,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> BatchResult:
+    """Upsert de cada fila del DataFrame y, si id_pac no es None, asigna id_pac a los correctos."""
+    async with RespondioClient(token_workspace(workspace), timeout=timeout) as client:
+        res = await client.upsert_many(
+            (convertir_row_a_payload(row) for _, row in df.iterrows()),
+            concurrencia=concurrencia,
+        )
+        _imprimir_resumen(f"RESUMEN UPSERT ({workspace})", res)
+
+        if id_pac is not None and res.ok:
+            res_idpac = await client.actualizar_id_pac(res.ok, id_pac, concurrencia=concurrencia)
+            _imprimir_resumen(f"ACTUALIZACIÓN id_pac={id_pac} ({workspace})", res_idpac)
+
+    return res